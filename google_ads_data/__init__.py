@@ -1,4 +1,8 @@
-from .account_utils import account_name_to_cust_id
+from .account_utils import (
+    account_name_to_cust_id,
+    clear_account_cache,
+    cust_id_to_refresh_token,
+)
 from .ga_utils import (
     account_time,
     account_date,
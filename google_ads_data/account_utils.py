@@ -15,20 +15,65 @@ Two functions are meant to be public:
 - account_name_to_cust_id
 - cust_id_to_refresh_token
 
+Results of both are cached in-process for ACCOUNT_CACHE_TTL seconds.
+Lookups that find nothing are not cached. clear_account_cache can be used
+to drop the cached values, along with the Google Ads config dicts, login
+customer ids, clients and services cached by ga_utils.
+
+cust_id_to_refresh_token_async is an asyncio version of
+cust_id_to_refresh_token that runs it in a worker thread, so it shares its
+cache and its pymongo connection.
+
 All other functions are internal to this module
 """
+import asyncio
 from enum import Enum
+import cachetools
+import cachetools.keys
+import functools
 import pymongo
+from pymongo.collation import Collation
+import threading
 from typing import Optional
 
+from .cache_utils import cached_unless_none, clear_caches
+
 
 class Env(Enum):
     Prod = "prod"
 
 
+ACCOUNT_CACHE_MAXSIZE = 1024
+ACCOUNT_CACHE_TTL = 3600
+
+_refresh_token_cache = cachetools.TTLCache(
+    maxsize=ACCOUNT_CACHE_MAXSIZE, ttl=ACCOUNT_CACHE_TTL
+)
+_refresh_token_lock = threading.Lock()
+
+_cust_id_cache = cachetools.TTLCache(
+    maxsize=ACCOUNT_CACHE_MAXSIZE, ttl=ACCOUNT_CACHE_TTL
+)
+_cust_id_lock = threading.Lock()
+
+# case insensitive name matching. Queries must use the same collation as
+# the name indexes created by ensure_account_indexes for the index to be used
+CASE_INSENSITIVE_COLLATION = Collation(locale="en", strength=2)
+
+# callers only ever read these fields of an AdWordsAccounts document
+ACCOUNT_PROJECTION = {
+    "_id": 0,
+    "data.refresh_token": 1,
+    "data.customerId.customerId": 1,
+}
+
+
+@functools.lru_cache(maxsize=4)
 def appx_mongo_db(env: str = Env.Prod.value) -> pymongo.database.Database:
     """
-    Create and return a mongo meteor-appx collection connection
+    Return a mongo meteor-appx database connection. One client is created
+    per env and kept for the life of the process so that lookups reuse
+    pooled sockets instead of reconnecting on every call
 
         Parameters:
             env (str): Environment from which to retrieve the account information. Default "prod".
@@ -40,12 +85,64 @@ def appx_mongo_db(env: str = Env.Prod.value) -> pymongo.database.Database:
     host = f"mongodb-{env}.motivemetrics.com"
     port = 27017
     client = pymongo.MongoClient(
-        host, port, connectTimeoutMS=2000, serverSelectionTimeoutMS=4000
+        host,
+        port,
+        maxPoolSize=50,
+        connectTimeoutMS=2000,
+        serverSelectionTimeoutMS=4000,
     )
     db = client["meteor-appx"]
     return db
 
 
+def ensure_account_indexes(env: str = Env.Prod.value) -> None:
+    """
+    Create the indexes used by the account lookups in this module. This is
+    a one-time migration; creating an index that already exists is a no-op
+
+        Parameters:
+            env (str): Environment in which to create the indexes. Default "prod".
+
+    """
+    db = appx_mongo_db(env)
+    for collection in (db.AdWordsAccounts, db.CustomerAccounts):
+        collection.create_index(
+            [("name", pymongo.ASCENDING)],
+            name="name_ci_1",
+            collation=CASE_INSENSITIVE_COLLATION,
+        )
+
+    db.AdWordsAccounts.create_index("data.customerId.customerId")
+
+
+def find_one_by_name(
+    collection: pymongo.collection.Collection,
+    name: str,
+    criteria: Optional[dict] = None,
+    projection: Optional[dict] = None,
+) -> Optional[dict]:
+    """
+    Return the first document in collection whose name matches name, case
+    insensitively. The match uses CASE_INSENSITIVE_COLLATION so that it can
+    use the collated name index created by ensure_account_indexes
+
+        Parameters:
+            collection (pymongo.collection.Collection): Collection to search
+            name (str): The (case insensitive) name to match
+            criteria (dict): Additional filter criteria. Default None.
+            projection (dict): Fields to return. Default None (all fields).
+
+        Returns:
+            document (dict): The matching document, or None
+
+    """
+    criteria = dict(criteria or {}, name=name)
+    document = collection.find_one(
+        criteria, projection=projection, collation=CASE_INSENSITIVE_COLLATION
+    )
+    return document
+
+
 def cust_id_to_account(cust_id: str, env: str = Env.Prod.value) -> Optional[dict]:
     """
     Return an account document by using cust_id to find a match
@@ -66,7 +163,10 @@ def cust_id_to_account(cust_id: str, env: str = Env.Prod.value) -> Optional[dict
     accounts = db.AdWordsAccounts
 
     # this needs to return the freshest account if there are multiple
-    account = accounts.find_one({"data.customerId.customerId": cust_id})
+    account = accounts.find_one(
+        {"data.customerId.customerId": cust_id},
+        projection=ACCOUNT_PROJECTION,
+    )
     return account
 
 
@@ -100,18 +200,17 @@ def account_name_to_account(
 
     criteria = {"type": "google"}
     if cust_name:
-        customers = db.CustomerAccounts
-        customer = customers.find_one(
-            {"name": {"$regex": f"^{cust_name}$", "$options": "-i"}}
+        customer = find_one_by_name(
+            db.CustomerAccounts, cust_name, projection={"accounts": 1}
         )
         if customer is None:
             return None
 
         criteria["_id"] = {"$in": customer["accounts"]}
 
-    accounts = db.AdWordsAccounts
-    criteria["name"] = {"$regex": "^{0}$".format(account_name), "$options": "-i"}
-    account = accounts.find_one(criteria)
+    account = find_one_by_name(
+        db.AdWordsAccounts, account_name, criteria, projection=ACCOUNT_PROJECTION
+    )
     return account
 
 
@@ -161,6 +260,13 @@ def account_name_to_refresh_token(
     return refresh_token
 
 
+@cached_unless_none(
+    _cust_id_cache,
+    key=lambda account_name, cust_name="", env=Env.Prod.value: cachetools.keys.hashkey(
+        account_name, cust_name, env
+    ),
+    lock=_cust_id_lock,
+)
 def account_name_to_cust_id(
     account_name: str, cust_name: str = "", env: str = Env.Prod.value
 ) -> Optional[dict]:
@@ -193,6 +299,16 @@ def account_name_to_cust_id(
     return cust_id
 
 
+def refresh_token_cache_key(cust_id: str, env: str = Env.Prod.value) -> tuple:
+    """
+    Return the refresh token cache key for a cust_id/env combo
+    """
+    return cachetools.keys.hashkey(cust_id, env)
+
+
+@cached_unless_none(
+    _refresh_token_cache, key=refresh_token_cache_key, lock=_refresh_token_lock
+)
 def cust_id_to_refresh_token(cust_id: str, env: str = Env.Prod.value) -> str:
     """
     Get the saved refresh token for the account associated with a Google Ads customer ID
@@ -208,3 +324,31 @@ def cust_id_to_refresh_token(cust_id: str, env: str = Env.Prod.value) -> str:
     account = cust_id_to_account(cust_id, env)
     refresh_token = account_to_refresh_token(account)
     return refresh_token
+
+
+def clear_account_cache() -> None:
+    """
+    Drop all cached refresh tokens and customer IDs so that the next lookups
+    go to the AppX mongodb database. This also drops the config dicts, login
+    customer ids, clients and services that were built from them
+    """
+    clear_caches()
+
+
+async def cust_id_to_refresh_token_async(
+    cust_id: str, env: str = Env.Prod.value
+) -> str:
+    """
+    asyncio version of cust_id_to_refresh_token. The lookup runs in a worker
+    thread so that it doesn't block the event loop
+
+        Parameters:
+            cust_id (str): customer ID
+            env (str): Environment from which to retrieve the account information. Default "prod".
+
+        Returns:
+            refresh_token (str): OAuth refresh token needed to access the account
+
+    """
+    refresh_token = await asyncio.to_thread(cust_id_to_refresh_token, cust_id, env)
+    return refresh_token
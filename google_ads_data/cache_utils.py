@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+Copyright (c) 2022 MotiveMetrics. All rights reserved.
+
+Caching helpers shared by the account and Google Ads API utilities.
+"""
+
+import cachetools
+import cachetools.keys
+import functools
+import threading
+import typing
+
+# every cache created through cached_unless_none, with its lock, so that
+# clear_caches can reset them all
+CACHES = []
+
+
+def cached_unless_none(
+    cache: typing.MutableMapping,
+    lock: typing.Optional[threading.Lock] = None,
+    key: typing.Callable[..., typing.Hashable] = cachetools.keys.hashkey,
+) -> typing.Callable:
+    """
+    Return a decorator that caches a function's results in cache, like
+    ``cachetools.cached``, except that None results are not cached. None
+    means a lookup failed or found nothing, and should be retried on the
+    next call rather than remembered until the cache entry expires
+
+        Parameters:
+            cache (typing.MutableMapping): cache to store results in
+            lock (threading.Lock): lock guarding the cache. Default is a new lock.
+            key (typing.Callable): function that returns the cache key for the call's arguments
+
+        Returns:
+            decorator (typing.Callable): the caching decorator
+
+    """
+    if lock is None:
+        lock = threading.Lock()
+
+    if not any(c is cache for c, _ in CACHES):
+        CACHES.append((cache, lock))
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            with lock:
+                try:
+                    return cache[k]
+                except KeyError:
+                    pass
+
+            value = func(*args, **kwargs)
+            if value is not None:
+                with lock:
+                    cache[k] = value
+
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def clear_caches() -> None:
+    """
+    Drop the cached values of every cache created through cached_unless_none
+    """
+    for cache, lock in CACHES:
+        with lock:
+            cache.clear()
@@ -13,20 +13,33 @@ and get a GoogleAdsService instance with which to make a query.
 """
 
 import boto3
+import cachetools
+import concurrent.futures
 import datetime
+import functools
+import math
+import numpy
 from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
 import google.ads.googleads.v19.services.services.google_ads_service.client as google_ads_client
+from google.ads.googleads.v19.services.types.google_ads_service import GoogleAdsRow
 from google.api_core import exceptions
 from google.api_core.retry import Retry
+from google.protobuf.descriptor import FieldDescriptor
 from google.protobuf.json_format import MessageToDict
+import operator
 import pandas
+from pandas.api.types import is_float_dtype, is_integer_dtype, union_categoricals
+import pyarrow
 import pytz
+import queue
 import re
+import threading
 import typing
 import yaml
 
 from .account_utils import cust_id_to_refresh_token
+from .cache_utils import cached_unless_none
 
 GOOGLE_ADS_API_VERSION = "v19"
 CUSTOMER_CLIENT_QUERY = """
@@ -39,14 +52,29 @@ CUSTOMER_CLIENT_QUERY = """
     WHERE customer_client.status='ENABLED'
 """
 
-client = boto3.client("ssm")
-response = client.get_parameter(Name="keys_google_adwords_api_keys.yml")
-GA_KEYS = yaml.safe_load(response["Parameter"]["Value"])
+# the login customer id for an account only changes if its manager changes
+LOGIN_CUSTOMER_ID_CACHE = cachetools.TTLCache(maxsize=4096, ttl=86400)
+LOGIN_SEARCH_MAX_WORKERS = 32
+
+# config dicts, clients and services per cust_id. The TTL lets refreshed
+# tokens and login customer ids get picked up
+GA_CLIENT_CACHE_MAXSIZE = 256
+GA_CLIENT_CACHE_TTL = 3600
+
+GOOGLE_ADS_ROW_DESCRIPTOR = GoogleAdsRow.pb().DESCRIPTOR
+
+CAMEL_TO_SNAKE_PATTERN = re.compile(r"(?<!^)(?=[A-Z])")
 
 CAMPAIGN_FROM_RESOURCE = "campaign"
 CAMPAIGN_FIELDS = ['campaign.id']
 
 MAX_RESULT_SIZE = 2000000
+# results are converted to dataframes this many rows at a time to bound
+# peak memory on large queries
+CHUNK_SIZE = 200000
+# number of SearchStream batches read ahead while earlier ones are processed
+PREFETCH_BATCHES = 2
+PARTITION_MAX_WORKERS = 8
 
 CATEGORICAL_COLS = (
     "ad_group.status",
@@ -60,6 +88,41 @@ CATEGORICAL_COLS = (
     "ad_group_ad.status"
 )
 
+NUMERIC_COLS = (
+    "metrics.impressions",
+    "metrics.clicks",
+    "metrics.cost_micros",
+    "metrics.interactions",
+    "metrics.conversions",
+    "metrics.conversions_value",
+    "metrics.all_conversions",
+    "metrics.all_conversions_value",
+    "metrics.ctr",
+    "metrics.average_cpc",
+)
+
+
+class ResultSizeExceeded(Exception):
+    """
+    Raised when a query returns more results than the caller allows
+    """
+
+
+@functools.lru_cache(maxsize=1)
+def get_ga_keys() -> dict:
+    """
+    Return the Google Ads API keys stored in SSM. They are fetched on first
+    use rather than at import, and cached for the life of the process
+
+        Returns:
+            ga_keys (dict): Google Ads API client_id, client_secret and developer_token
+
+    """
+    client = boto3.client("ssm")
+    response = client.get_parameter(Name="keys_google_adwords_api_keys.yml")
+    ga_keys = yaml.safe_load(response["Parameter"]["Value"])
+    return ga_keys
+
 
 def make_base_ga_config_dict(refresh_token: str) -> dict:
     """
@@ -71,16 +134,51 @@ def make_base_ga_config_dict(refresh_token: str) -> dict:
         Returns:
             config_dict (dict): Google Ads API config info
     """
+    ga_keys = get_ga_keys()
     config_dict = dict(
         refresh_token=refresh_token,
-        client_id=GA_KEYS["client_id"],
-        client_secret=GA_KEYS["client_secret"],
-        developer_token=GA_KEYS["developer_token"],
+        client_id=ga_keys["client_id"],
+        client_secret=ga_keys["client_secret"],
+        developer_token=ga_keys["developer_token"],
         use_proto_plus=True,
     )
     return config_dict
 
 
+def is_customer_client(
+    google_ads_service: google_ads_client.GoogleAdsServiceClient,
+    parent_id: str,
+    cust_id: str,
+) -> bool:
+    """
+    Return whether cust_id is a client of the parent_id account
+
+        Parameters:
+            google_ads_service (google_ads_client.GoogleAdsServiceClient): Google Ads Client service
+            parent_id (str): Customer ID of the candidate parent account
+            cust_id (str): Customer ID
+
+        Returns:
+            (bool) True if cust_id is a client of parent_id
+
+    """
+    try:
+        response = google_ads_service.search(
+            customer_id=parent_id,
+            query=CUSTOMER_CLIENT_QUERY,
+            retry=Retry(maximum=8, deadline=15),
+        )
+    except GoogleAdsException:
+        return False
+
+    for result in response.results:
+        if result.customer_client.id == int(cust_id):
+            return True
+
+    return False
+
+
+@cached_unless_none(LOGIN_CUSTOMER_ID_CACHE)
 def get_login_customer_id(cust_id: str, refresh_token: str) -> str:
     """
     Return login customer id with provided cust_id and refresh_token
@@ -109,59 +207,80 @@ def get_login_customer_id(cust_id: str, refresh_token: str) -> str:
     if cust_id in direct_ids:
         return cust_id
 
+    if not direct_ids:
+        return None
+
     # the account we want data for is a sub-account of the authorizing
     # account, so we need to find out which of the top-level accounts is
-    # the parent
+    # the parent. Check all of them at once, so the wait is the slowest
+    # search rather than the sum of them, and stop at the first match
     google_ads_service = client.get_service(
         "GoogleAdsService", version=GOOGLE_ADS_API_VERSION
     )
-    for parent_id in direct_ids:
-        try:
-            response = google_ads_service.search(
-                customer_id=parent_id,
-                query=CUSTOMER_CLIENT_QUERY,
-                retry=Retry(maximum=8, deadline=15),
-            )
-        except GoogleAdsException:
-            continue
-
-        for result in response.results:
-            if result.customer_client.id == int(cust_id):
-                return parent_id
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(len(direct_ids), LOGIN_SEARCH_MAX_WORKERS)
+    )
+    try:
+        futures = {
+            executor.submit(
+                is_customer_client, google_ads_service, parent_id, cust_id
+            ): parent_id
+            for parent_id in direct_ids
+        }
+        for future in concurrent.futures.as_completed(futures):
+            if future.result():
+                return futures[future]
+    finally:
+        # don't wait for searches that are still running once we have a match
+        executor.shutdown(wait=False, cancel_futures=True)
 
     return None
 
 
+@cached_unless_none(
+    cachetools.TTLCache(maxsize=GA_CLIENT_CACHE_MAXSIZE, ttl=GA_CLIENT_CACHE_TTL)
+)
 def build_config_dict(cust_id: str) -> dict:
     """
-    Return config dict for provided cust_id
+    Return config dict for provided cust_id. Config dicts are cached per cust_id
 
         Parameters:
             cust_id (str): Customer ID
 
         Returns:
-            config_dict (dict): Google Ads API config info
+            config_dict (dict): Google Ads API config info, or None if the
+            refresh token or login customer id can't be found
 
     """
     refresh_token = cust_id_to_refresh_token(cust_id)
     if refresh_token is None:
         return None
 
+    # get_login_customer_id returns cust_id itself for a direct account, so
+    # None means the parent search failed. Return None so that neither this
+    # config nor the client and services built from it are cached, and the
+    # next call searches again
+    login_customer_id = get_login_customer_id(cust_id, refresh_token)
+    if login_customer_id is None:
+        return None
+
     config_dict = make_base_ga_config_dict(refresh_token)
-    config_dict["login_customer_id"] = get_login_customer_id(cust_id, refresh_token)
+    config_dict["login_customer_id"] = login_customer_id
     return config_dict
 
 
-def get_ga_api_service(cust_id: str, service_name: str) -> google_ads_client.GoogleAdsServiceClient:
+@cached_unless_none(
+    cachetools.TTLCache(maxsize=GA_CLIENT_CACHE_MAXSIZE, ttl=GA_CLIENT_CACHE_TTL)
+)
+def get_ga_client(cust_id: str) -> GoogleAdsClient:
     """
-    Return a service client instance for the specified service_name
+    Return a Google Ads client for cust_id. Clients are cached per cust_id
 
         Parameters:
             cust_id (str): Customer ID
-            service_name (str): Google Ads Client service name
 
         Returns:
-            service (google_ads_client.GoogleAdsServiceClient): Google Ads Client service
+            client (GoogleAdsClient): Google Ads client
 
     """
     config_dict = build_config_dict(cust_id)
@@ -169,10 +288,34 @@ def get_ga_api_service(cust_id: str, service_name: str) -> google_ads_client.Goo
         return None
 
     client = GoogleAdsClient.load_from_dict(config_dict)
+    return client
+
+
+@cached_unless_none(
+    cachetools.TTLCache(maxsize=GA_CLIENT_CACHE_MAXSIZE, ttl=GA_CLIENT_CACHE_TTL)
+)
+def get_ga_api_service(cust_id: str, service_name: str) -> google_ads_client.GoogleAdsServiceClient:
+    """
+    Return a service client instance for the specified service_name.
+    Services are cached per cust_id and service_name
+
+        Parameters:
+            cust_id (str): Customer ID
+            service_name (str): Google Ads Client service name
+
+        Returns:
+            service (google_ads_client.GoogleAdsServiceClient): Google Ads Client service
+
+    """
+    client = get_ga_client(cust_id)
+    if client is None:
+        return None
+
     service = client.get_service(service_name, version=GOOGLE_ADS_API_VERSION)
     return service
 
 
+@functools.lru_cache(maxsize=1024)
 def camel_to_snake(camel_string: str) -> str:
     """
     Convert and return a string from camel case to snake case
@@ -184,11 +327,11 @@ def camel_to_snake(camel_string: str) -> str:
             snake_string (str) Converted snake case string
 
     """
-    pattern = re.compile(r"(?<!^)(?=[A-Z])")
-    snake_string = pattern.sub("_", camel_string).lower()
+    snake_string = CAMEL_TO_SNAKE_PATTERN.sub("_", camel_string).lower()
     return snake_string
 
 
+@functools.lru_cache(maxsize=1024)
 def snake_to_camel(snake_string: str) -> str:
     """
     Convert and return a string from snake case to camel case
@@ -218,37 +361,180 @@ def get_nested_dict_value(key: str, nested_dict: dict) -> typing.Union[dict, str
             value (dict | str | int | float): value of the key from nested dict
 
     """
-    keys = key.split(".")
+    # a single .get per level; a missing key and a None value both end the walk
     value = nested_dict
-    for k in keys:
-        if k not in value:
-            return None
-
+    for k in key.split("."):
         value = value.get(k)
+        if value is None:
+            return None
 
     return value
 
 
-def account_time(cust_id: str) -> datetime.datetime:
+def is_repeated_field(field_descriptor: FieldDescriptor) -> bool:
     """
-    Returns a timezone-aware datetime that represents the current
-    time in the account's timezone
+    Return whether a field is repeated. FieldDescriptor.label is deprecated
+    in protobuf 6, so use is_repeated where the installed protobuf has it
+
+        Parameters:
+            field_descriptor (FieldDescriptor): descriptor of the field
+
+        Returns:
+            (bool) True if the field is repeated
+
+    """
+    is_repeated = getattr(field_descriptor, "is_repeated", None)
+    if is_repeated is None:
+        return field_descriptor.label == FieldDescriptor.LABEL_REPEATED
+
+    return is_repeated
+
+
+def make_value_converter(
+    field_descriptor: FieldDescriptor,
+) -> typing.Optional[typing.Callable[[typing.Any], typing.Any]]:
+    """
+    Return a function that converts a raw protobuf value of a field to a
+    plain python value, or None if the value can be used as is. Enums
+    become their names, repeated fields become lists and messages become dicts.
+    Enum numbers that the installed client doesn't know become strings of the
+    number
+
+        Parameters:
+            field_descriptor (FieldDescriptor): descriptor of the field
+
+        Returns:
+            convert (typing.Callable | None): conversion function
+
+    """
+    if field_descriptor.enum_type is not None:
+        names = {v.number: v.name for v in field_descriptor.enum_type.values}
+        def convert(value):
+            return names.get(value, str(value))
+    elif field_descriptor.message_type is not None:
+        def convert(value):
+            return MessageToDict(value, preserving_proto_field_name=True)
+    else:
+        convert = None
+
+    if is_repeated_field(field_descriptor):
+        if convert is None:
+            return list
+
+        convert_item = convert
+
+        def convert(values):
+            return [convert_item(v) for v in values]
+
+    return convert
+
+
+@functools.lru_cache(maxsize=1024)
+def resolve_field(field: str) -> typing.Tuple[FieldDescriptor, str]:
+    """
+    Resolve a GAQL field against the GoogleAdsRow descriptor. GAQL uses the
+    API field names, but the generated protos rename fields that clash with
+    python keywords or builtins with a trailing underscore (``ad_group_ad.ad.type``
+    is ``ad_group_ad.ad.type_``), so each name falls back to ``name + "_"``
+
+        Parameters:
+            field (str): The Google Ads API resource field. For example ``campaign.id``
+
+        Returns:
+            (field_descriptor, attr_path) (typing.Tuple[FieldDescriptor, str]): descriptor of
+            the field, and its dotted attribute path on the raw protobuf message
+
+    """
+    descriptor = GOOGLE_ADS_ROW_DESCRIPTOR
+    names = []
+    for name in field.split("."):
+        if name not in descriptor.fields_by_name:
+            name += "_"
+
+        field_descriptor = descriptor.fields_by_name[name]
+        names.append(name)
+        descriptor = field_descriptor.message_type
+
+    return field_descriptor, ".".join(names)
+
+
+def is_scalar_field(field: str) -> bool:
+    """
+    Return whether a GAQL field holds a single scalar or enum value, as
+    opposed to a repeated field or a message
+
+        Parameters:
+            field (str): The Google Ads API resource field. For example ``campaign.id``
+
+        Returns:
+            (bool) True if the field is a scalar or enum field
+
+    """
+    field_descriptor, _ = resolve_field(field)
+    return not is_repeated_field(field_descriptor) and field_descriptor.message_type is None
+
+
+@functools.lru_cache(maxsize=1024)
+def make_field_getter(field: str) -> typing.Callable[[typing.Any], typing.Any]:
+    """
+    Return a function that reads a field from the raw protobuf message
+    (``result._pb``) of a GoogleAdsRow result. The field is resolved against
+    the GoogleAdsRow descriptor once, and getters are cached per field
+
+        Parameters:
+            field (str): The Google Ads API resource field. For example ``campaign.id``
+
+        Returns:
+            getter (typing.Callable): function that returns the field's value for a raw result
+
+    """
+    field_descriptor, attr_path = resolve_field(field)
+    get = operator.attrgetter(attr_path)
+    convert = make_value_converter(field_descriptor)
+    if convert is None:
+        return get
+
+    def getter(result_pb):
+        return convert(get(result_pb))
+
+    return getter
+
+
+@functools.lru_cache(maxsize=1024)
+def account_timezone(cust_id: str) -> datetime.tzinfo:
+    """
+    Returns the account's timezone. The result is cached per account
 
         Parameters:
             cust_id (str): ``customer.id`` for the Google Ads account
 
         Returns:
-            account_time (datetime.datetime): Account's current time
+            timezone (datetime.tzinfo): Account's timezone
 
     """
     service = get_ga_api_service(cust_id, "GoogleAdsService")
-    query = "SELECT customer.time_zone FROM customer"
+    query = "SELECT customer.time_zone FROM customer LIMIT 1"
     response = service.search(
         customer_id=cust_id, query=query, retry=Retry(maximum=8, deadline=15)
     )
-    row = list(response)[0]
+    row = next(iter(response))
     timezone = pytz.timezone(row.customer.time_zone)
-    account_time = datetime.datetime.utcnow().astimezone(timezone)
+    return timezone
+
+
+def account_time(cust_id: str) -> datetime.datetime:
+    """
+    Returns a timezone-aware datetime that represents the current
+    time in the account's timezone
+
+        Parameters:
+            cust_id (str): ``customer.id`` for the Google Ads account
+
+        Returns:
+            account_time (datetime.datetime): Account's current time
+
+    """
+    account_time = datetime.datetime.now(account_timezone(cust_id))
     return account_time
 
 
@@ -266,39 +552,32 @@ def account_date(custId: str) -> datetime.date:
     return date
 
 
-def make_base_query(
+def resolve_dates(
     cust_id: str,
-    from_resource: str,
-    fields: typing.List[str],
     start: typing.Union[datetime.date, datetime.datetime] = None,
     end: typing.Union[datetime.date, datetime.datetime] = None,
-    zero_impressions: bool = False,
-) -> str:
+) -> typing.Tuple[datetime.date, datetime.date]:
     """
-    Make a basic Google Ads Query Language (GAQL) query to be used with
-    `GoogleAdsService.SearchStream` or `GoogleAdsService.Search`
+    Return the start and end dates for a query, filling in missing dates
+    with the current day for the account
 
         Parameters:
             cust_id (str): The Google Ads ``customer.id`` resource for the account.
-            from_resource (str): The Google Ads API resource that fields will be selected from.
-            For example ``keyword_view``
-
-            fields (typing.List[str]): The Google Ads API resource fields that you want to return data
-            for. For example ``['campaign.name', 'metrics.impressions']``
-
             start (typing.Union[datetime.date, datetime.datetime]): Start date for metrics. Defaults to the current day
             for the specified customer account.
 
             end (typing.Union[datetime.date, datetime.datetime]): End date for metrics. Defaults to the current day for
             the specified customer account.
 
-            zero_impressions (bool): Whether to include resources with zero impressions. Default is False.
-
         Returns:
-            query (str): A fully formed GAQL query.
+            (start, end) (typing.Tuple[datetime.date, datetime.date]): Start and end dates
 
     """
-    today = account_date(cust_id)
+    # only look up the account's current date if it is needed
+    today = None
+    if start is None or end is None:
+        today = account_date(cust_id)
+
     if start is None:
         start = today
 
@@ -311,46 +590,334 @@ def make_base_query(
     if isinstance(end, datetime.datetime):
         end = end.date()
 
-    query = "SELECT "
-    query += ", ".join(fields)
-    query += f" FROM {from_resource} "
+    return start, end
+
+
+def make_where_clause(
+    cust_id: str,
+    start: typing.Union[datetime.date, datetime.datetime] = None,
+    end: typing.Union[datetime.date, datetime.datetime] = None,
+    zero_impressions: bool = False,
+) -> str:
+    """
+    Make the conditions of a basic Google Ads Query Language (GAQL) WHERE clause
+
+        Parameters:
+            cust_id (str): The Google Ads ``customer.id`` resource for the account.
+            start (typing.Union[datetime.date, datetime.datetime]): Start date for metrics. Defaults to the current day
+            for the specified customer account.
+
+            end (typing.Union[datetime.date, datetime.datetime]): End date for metrics. Defaults to the current day for
+            the specified customer account.
+
+            zero_impressions (bool): Whether to include resources with zero impressions. Default is False.
+
+        Returns:
+            where_clause (str): The WHERE clause conditions, without the ``WHERE`` keyword.
+
+    """
+    start, end = resolve_dates(cust_id, start, end)
 
     wheres = []
     if zero_impressions is False:
         wheres.append("metrics.impressions > 0")
 
-    start_str = start.strftime("%Y-%m-%d")
+    start_str = start.isoformat()
     wheres.append(f"segments.date >= '{start_str}'")
 
-    end_str = end.strftime("%Y-%m-%d")
+    end_str = end.isoformat()
     wheres.append(f"segments.date <= '{end_str}'")
 
-    whereclause = " AND ".join(wheres)
-    query += f" WHERE {whereclause}"
+    where_clause = " AND ".join(wheres)
+    return where_clause
 
+
+def make_query(from_resource: str, fields: typing.List[str], where_clause: str) -> str:
+    """
+    Make a Google Ads Query Language (GAQL) query from its parts
+
+        Parameters:
+            from_resource (str): The Google Ads API resource that fields will be selected from.
+            fields (typing.List[str]): The Google Ads API resource fields to select.
+            where_clause (str): The WHERE clause conditions, without the ``WHERE`` keyword.
+
+        Returns:
+            query (str): A fully formed GAQL query.
+
+    """
+    query = "SELECT "
+    query += ", ".join(fields)
+    query += f" FROM {from_resource} "
+    query += f" WHERE {where_clause}"
     return query
 
 
-def convert_to_category_dtype(df: pandas.DataFrame) -> pandas.DataFrame:
+def make_base_query(
+    cust_id: str,
+    from_resource: str,
+    fields: typing.List[str],
+    start: typing.Union[datetime.date, datetime.datetime] = None,
+    end: typing.Union[datetime.date, datetime.datetime] = None,
+    zero_impressions: bool = False,
+) -> str:
     """
-    Convert dataframe columns to category dtype to save memory
+    Make a basic Google Ads Query Language (GAQL) query to be used with
+    `GoogleAdsService.SearchStream` or `GoogleAdsService.Search`
+
+        Parameters:
+            cust_id (str): The Google Ads ``customer.id`` resource for the account.
+            from_resource (str): The Google Ads API resource that fields will be selected from.
+            For example ``keyword_view``
+
+            fields (typing.List[str]): The Google Ads API resource fields that you want to return data
+            for. For example ``['campaign.name', 'metrics.impressions']``
+
+            start (typing.Union[datetime.date, datetime.datetime]): Start date for metrics. Defaults to the current day
+            for the specified customer account.
+
+            end (typing.Union[datetime.date, datetime.datetime]): End date for metrics. Defaults to the current day for
+            the specified customer account.
+
+            zero_impressions (bool): Whether to include resources with zero impressions. Default is False.
+
+        Returns:
+            query (str): A fully formed GAQL query.
+
+    """
+    where_clause = make_where_clause(cust_id, start, end, zero_impressions)
+    query = make_query(from_resource, fields, where_clause)
+    return query
+
+
+def downcast_dtypes(
+    df: pandas.DataFrame, downcast_numeric: bool = False
+) -> pandas.DataFrame:
+    """
+    Convert dataframe columns to smaller dtypes to save memory. Columns in
+    CATEGORICAL_COLS become category dtype. If downcast_numeric is True, int
+    columns in NUMERIC_COLS become int32 when their values fit, and float
+    columns become float32. Ints are never narrowed below int32 so that
+    ordinary metric arithmetic doesn't overflow
 
         Parameters:
             df (pandas.DataFrame): dataframe to be converted
+            downcast_numeric (bool): Whether to downcast NUMERIC_COLS. Default is False.
 
         Returns:
             df (pandas.DataFrame): converted dataframe
 
     """
-    for col in CATEGORICAL_COLS:
-        if col in df.columns:
-            df[col] = df[col].astype('category')
+    dtype_map = {col: "category" for col in CATEGORICAL_COLS if col in df.columns}
+
+    if downcast_numeric:
+        int32 = numpy.iinfo(numpy.int32)
+        for col in NUMERIC_COLS:
+            if col not in df.columns:
+                continue
+
+            if is_integer_dtype(df[col]):
+                if df[col].empty or (df[col].min() >= int32.min and df[col].max() <= int32.max):
+                    dtype_map[col] = numpy.int32
+            elif is_float_dtype(df[col]):
+                dtype_map[col] = numpy.float32
+
+    # astype returns a new dataframe, so the caller's is left unchanged
+    if dtype_map:
+        df = df.astype(dtype_map)
 
     return df
 
 
+def columns_to_table(fields: typing.List[str], columns: typing.List[list]) -> pyarrow.Table:
+    """
+    Return columns of result values as an Arrow table. Columns in
+    CATEGORICAL_COLS are dictionary encoded, and become categoricals when
+    the table is converted to pandas
+
+        Parameters:
+            fields (typing.List[str]): The Google Ads API resource fields
+            columns (typing.List[list]): values for each field
+
+        Returns:
+            table (pyarrow.Table): Arrow table with a column for each field
+
+    """
+    arrays = []
+    for field, values in zip(fields, columns):
+        array = pyarrow.array(values)
+        if field in CATEGORICAL_COLS:
+            array = array.dictionary_encode()
+
+        arrays.append(array)
+
+    return pyarrow.Table.from_arrays(arrays, names=fields)
+
+
+def concat_dataframes(dfs: typing.List[pandas.DataFrame]) -> pandas.DataFrame:
+    """
+    Concatenate dataframes that have the same columns, keeping categorical
+    columns categorical
+
+        Parameters:
+            dfs (typing.List[pandas.DataFrame]): dataframes to be concatenated
+
+        Returns:
+            df (pandas.DataFrame): concatenated dataframe
+
+    """
+    # empty dataframes have no categories to unify and add no rows
+    dfs = [df for df in dfs if not df.empty] or dfs[:1]
+    if len(dfs) == 1:
+        return dfs[0]
+
+    # concat only keeps a categorical column categorical if every dataframe
+    # has the same categories for it
+    for col in CATEGORICAL_COLS:
+        if col in dfs[0].columns:
+            categories = union_categoricals([df[col] for df in dfs]).categories
+            for df in dfs:
+                df[col] = df[col].cat.set_categories(categories)
+
+    return pandas.concat(dfs, ignore_index=True)
+
+
+def prefetch(iterable: typing.Iterable, size: int = PREFETCH_BATCHES) -> typing.Iterator:
+    """
+    Iterate over iterable in a background thread, reading up to size items
+    ahead of the caller. Used to receive the next SearchStream batch while
+    the current one is being processed. Exceptions raised by iterable are
+    re-raised to the caller
+
+        Parameters:
+            iterable (typing.Iterable): items to read ahead
+            size (int): maximum number of items to read ahead. Default is PREFETCH_BATCHES.
+
+        Returns:
+            items (typing.Iterator): the items of iterable, in order
+
+    """
+    items = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry):
+        # give up if the caller has stopped iterating
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as error:
+            put((done, error))
+        else:
+            put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+
+                return
+
+            yield item
+    finally:
+        stop.set()
+
+
+def results_to_dataframe(
+    results: typing.Iterable,
+    fields: typing.List[str],
+    max_rows: typing.Optional[int] = None,
+    downcast_numeric: bool = False,
+) -> pandas.DataFrame:
+    """
+    Return the requested fields of Google Ads API result rows as a pandas
+    DataFrame. Scalar fields are converted to typed Arrow arrays CHUNK_SIZE
+    rows at a time, so only one chunk of their values is held as python
+    objects. Repeated and message fields are kept as python lists and dicts
+    in object columns, because Arrow would return them as numpy arrays
+
+        Parameters:
+            results (typing.Iterable): GoogleAdsRow results
+            fields (typing.List[str]): The Google Ads API resource fields to extract
+            max_rows (typing.Optional[int]): Raise ResultSizeExceeded if there are more
+            results than this. Default is None (no limit).
+            downcast_numeric (bool): Whether to downcast NUMERIC_COLS. See downcast_dtypes. Default is False.
+
+        Returns:
+            df (pandas.DataFrame): A pandas DataFrame with data for each of the requested fields.
+
+    """
+    results = iter(results)
+    getters = [make_field_getter(f) for f in fields]
+    scalar_fields = [f for f in fields if is_scalar_field(f)]
+    object_columns = {f: [] for f in fields if not is_scalar_field(f)}
+    tables = []
+    total_rows = 0
+    while True:
+        columns = [[] for _ in fields]
+        field_getters = [(column.append, get) for column, get in zip(columns, getters)]
+        n_rows = 0
+        for result in results:
+            result_pb = result._pb
+            for append, get in field_getters:
+                append(get(result_pb))
+
+            n_rows += 1
+            if n_rows == CHUNK_SIZE:
+                break
+
+        total_rows += n_rows
+        if max_rows is not None and total_rows > max_rows:
+            raise ResultSizeExceeded(f"query returned more than {max_rows} results")
+
+        if n_rows or not tables:
+            scalar_columns = []
+            for field, values in zip(fields, columns):
+                if field in object_columns:
+                    object_columns[field].extend(values)
+                else:
+                    scalar_columns.append(values)
+
+            tables.append(columns_to_table(scalar_fields, scalar_columns))
+
+        if n_rows < CHUNK_SIZE:
+            break
+
+    # chunks are concatenated without copying; their dictionaries are unified
+    # so each categorical column gets a single set of categories
+    table = pyarrow.concat_tables(tables).unify_dictionaries()
+    df = table.to_pandas()
+    if object_columns:
+        if not scalar_fields:
+            df = pandas.DataFrame(index=pandas.RangeIndex(total_rows))
+
+        for field, values in object_columns.items():
+            df[field] = pandas.Series(values, index=df.index, dtype=object)
+
+        df = df[fields]
+
+    return downcast_dtypes(df, downcast_numeric)
+
+
 def execute_query(
-    cust_id: str, query: str, fields: typing.List[str]
+    cust_id: str,
+    query: str,
+    fields: typing.List[str],
+    max_rows: typing.Optional[int] = None,
+    downcast_numeric: bool = False,
 ) -> pandas.DataFrame:
     """
     Execute a GAQL query using ``GoogleAdsService.SearchStream``
@@ -360,13 +927,14 @@ def execute_query(
             cust_id (str): The Google Ads ``customer.id`` resource for the account.
             query (str): A fully-formed GAQL query.
             fields (typing.List[str]): The Google Ads API resource fields that are selected in the query
+            max_rows (typing.Optional[int]): Raise ResultSizeExceeded if the query returns more
+            results than this. Default is None (no limit).
+            downcast_numeric (bool): Whether to downcast NUMERIC_COLS. See downcast_dtypes. Default is False.
 
         Returns:
             A pandas DataFrame with data for each of the requested fields.
 
     """
-    camel_fields = [snake_to_camel(f) for f in fields]
-
     service = get_ga_api_service(cust_id, "GoogleAdsService")
     stream = service.search_stream(
         customer_id=cust_id,
@@ -374,67 +942,187 @@ def execute_query(
         retry=Retry(maximum=20, deadline=60)
     )
 
-    rows = []
     try:
-        for batch in stream:
-            for result in batch.results:
-                result_dict = MessageToDict(result._pb)
-                row = []
-                for field in camel_fields:
-                    row.append(get_nested_dict_value(field, result_dict))
-
-                rows.append(row)
+        df = results_to_dataframe(
+            (result for batch in prefetch(stream) for result in batch.results),
+            fields,
+            max_rows,
+            downcast_numeric,
+        )
     except exceptions.Unknown:
         response = service.search(
             customer_id=cust_id,
             query=query,
             retry=Retry(maximum=20, deadline=60)
         )
-        for result in response:
-            result_dict = MessageToDict(result._pb)
-            row = []
-            for field in camel_fields:
-                row.append(get_nested_dict_value(field, result_dict))
-
-            rows.append(row)
+        df = results_to_dataframe(response, fields, max_rows, downcast_numeric)
 
-    df = pandas.DataFrame(rows, columns=fields)
-    return convert_to_category_dtype(df)
+    return df
 
 
-def check_result_size(cust_id: str, query: str) -> int:
+def check_result_size(
+    cust_id: str,
+    from_resource: str,
+    fields: typing.List[str],
+    where_clause: str,
+    client: typing.Optional[GoogleAdsClient] = None,
+) -> int:
     """
-    Make a request with page_size=1 and return_total_results_count=True
-    to get number of results we'll get from this query
+    Make a request with LIMIT 1 and return_total_results_count=True
+    to get number of results we'll get from a query. The total ignores the
+    LIMIT. Google Ads API v17 and later reject a page_size on the request
 
         Parameters:
             cust_id (str): The Google Ads ``customer.id`` resource for the account.
-            query (str): A fully-formed GAQL query.
+            from_resource (str): The Google Ads API resource that the query selects from.
+            fields (typing.List[str]): The fields selected by the query.
+            where_clause (str): The query's WHERE clause conditions, without the ``WHERE`` keyword.
+            client (typing.Optional[GoogleAdsClient]): Client to make the request with. Defaults to
+            the cached client for cust_id.
 
         Returns:
             count (int): An int indicates number of results we'll get from this query.
 
     """
-    config_dict = build_config_dict(cust_id)
-    client = GoogleAdsClient.load_from_dict(config_dict)
-    search_request = client.get_type("SearchGoogleAdsRequest")
+    if client is None:
+        client = get_ga_client(cust_id)
+        service = get_ga_api_service(cust_id, "GoogleAdsService")
+    else:
+        service = client.get_service("GoogleAdsService", version=GOOGLE_ADS_API_VERSION)
 
-    query_split = query.split('FROM')
+    search_request = client.get_type("SearchGoogleAdsRequest")
 
-    size_query = f"{query_split[0].split(', ')[0]} FROM {query_split[1]}"
+    # segments split rows, so they have to be selected for the count to
+    # match the query's. Other fields don't change the number of rows
+    size_fields = [fields[0]] + [
+        f for f in fields[1:] if f.startswith("segments.")
+    ]
 
     search_request.customer_id = cust_id
-    search_request.query = size_query
-    search_request.page_size = 1
+    search_request.query = make_query(from_resource, size_fields, where_clause) + " LIMIT 1"
     search_request.return_total_results_count = True
 
-    service = client.get_service("GoogleAdsService", version=GOOGLE_ADS_API_VERSION)
     results = service.search(request=search_request)
 
     count = results.total_results_count
     return count
 
 
+def get_campaign_ids(cust_id: str) -> typing.List[str]:
+    """
+    Return the ids of all campaigns in an account
+
+        Parameters:
+            cust_id (str): The Google Ads ``customer.id`` resource for the account.
+
+        Returns:
+            campaign_ids (typing.List[str]): ``campaign.id`` of each campaign
+
+    """
+    query = f"SELECT {', '.join(CAMPAIGN_FIELDS)} FROM {CAMPAIGN_FROM_RESOURCE}"
+    df = execute_query(cust_id, query, CAMPAIGN_FIELDS)
+    campaign_ids = df["campaign.id"].tolist()
+    return campaign_ids
+
+
+def execute_queries(
+    cust_id: str,
+    queries: typing.List[str],
+    fields: typing.List[str],
+    downcast_numeric: bool = False,
+) -> pandas.DataFrame:
+    """
+    Execute GAQL queries that select the same fields concurrently and return
+    the combined results
+
+        Parameters:
+            cust_id (str): The Google Ads ``customer.id`` resource for the account.
+            queries (typing.List[str]): Fully-formed GAQL queries.
+            fields (typing.List[str]): The Google Ads API resource fields that are selected in the queries
+            downcast_numeric (bool): Whether to downcast NUMERIC_COLS. See downcast_dtypes. Default is False.
+
+        Returns:
+            df (pandas.DataFrame): A pandas DataFrame with data for each of the requested fields.
+
+    """
+    # the queries are I/O bound on the Google Ads API, so run them in threads
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(PARTITION_MAX_WORKERS, len(queries))
+    ) as executor:
+        dfs = list(
+            executor.map(
+                lambda q: execute_query(cust_id, q, fields, downcast_numeric=downcast_numeric),
+                queries,
+            )
+        )
+
+    df = concat_dataframes(dfs)
+    return df
+
+
+def split_date_range(
+    start: datetime.date, end: datetime.date, n_windows: int
+) -> typing.List[typing.Tuple[datetime.date, datetime.date]]:
+    """
+    Split the days from start to end (inclusive) into up to n_windows
+    consecutive windows of nearly equal length
+
+        Parameters:
+            start (datetime.date): First day of the range
+            end (datetime.date): Last day of the range
+            n_windows (int): Number of windows to split the range into
+
+        Returns:
+            windows (typing.List[typing.Tuple[datetime.date, datetime.date]]): start and end day of each window
+
+    """
+    n_days = (end - start).days + 1
+    step = math.ceil(n_days / min(n_windows, n_days))
+    windows = []
+    for offset in range(0, n_days, step):
+        window_start = start + datetime.timedelta(days=offset)
+        window_end = min(end, window_start + datetime.timedelta(days=step - 1))
+        windows.append((window_start, window_end))
+
+    return windows
+
+
+def execute_partitioned_query(
+    cust_id: str,
+    query: str,
+    fields: typing.List[str],
+    n_partitions: int,
+    downcast_numeric: bool = False,
+) -> pandas.DataFrame:
+    """
+    Execute a GAQL query as n_partitions concurrent queries, each restricted
+    to a subset of the account's campaigns, and return the combined results
+
+        Parameters:
+            cust_id (str): The Google Ads ``customer.id`` resource for the account.
+            query (str): A fully-formed GAQL query, including a WHERE clause.
+            fields (typing.List[str]): The Google Ads API resource fields that are selected in the query
+            n_partitions (int): Number of queries to split the query into
+            downcast_numeric (bool): Whether to downcast NUMERIC_COLS. See downcast_dtypes. Default is False.
+
+        Returns:
+            df (pandas.DataFrame): A pandas DataFrame with data for each of the requested fields.
+
+    """
+    campaign_ids = get_campaign_ids(cust_id)
+    if not campaign_ids:
+        return execute_query(cust_id, query, fields, downcast_numeric=downcast_numeric)
+
+    step = math.ceil(len(campaign_ids) / n_partitions)
+    queries = [
+        query + f" AND campaign.id IN ({','.join(map(str, campaign_ids[i:i + step]))})"
+        for i in range(0, len(campaign_ids), step)
+    ]
+
+    df = execute_queries(cust_id, queries, fields, downcast_numeric)
+    return df
+
+
 def get_ga_data(
     cust_id: str,
     from_resource: str,
@@ -443,6 +1131,7 @@ def get_ga_data(
     end: typing.Union[datetime.date, datetime.datetime] = None,
     zero_impressions: bool = False,
     wheres: typing.List[str] = [],
+    downcast_numeric: bool = False,
 ) -> pandas.DataFrame:
     """
     Get a pandas dataframe of Google Ads data for a customer account
@@ -465,15 +1154,57 @@ def get_ga_data(
             wheres (typing.List[str]): Additional 'WHERE' clauses to add to the GAQL query. For example
             ``ad_group_ad.ad.type = 'RESPONSIVE_SEARCH_AD'``. Default is [].
 
+            downcast_numeric (bool): Whether to store NUMERIC_COLS as int32 (when their values fit) and
+            float32 to save memory. Default is False.
+
         Returns:
             df (pandas.DataFrame): A pandas DataFrame with data for each of the requested fields.
 
     """
-    query = make_base_query(cust_id, from_resource, fields, start, end, zero_impressions)
+    start, end = resolve_dates(cust_id, start, end)
+
+    # an empty date range can't match anything, so don't ask the API
+    if start > end:
+        return downcast_dtypes(pandas.DataFrame(columns=fields), downcast_numeric)
+
+    where_clause = make_where_clause(cust_id, start, end, zero_impressions)
 
     if wheres:
-        query += " AND " + " AND ".join(wheres)
+        where_clause += " AND " + " AND ".join(wheres)
+
+    query = make_query(from_resource, fields, where_clause)
 
-    df = execute_query(cust_id, query, fields)
+    # most queries are well under MAX_RESULT_SIZE, so fetch optimistically
+    # and only size and partition the query if the fetch turns out too big
+    try:
+        df = execute_query(
+            cust_id,
+            query,
+            fields,
+            max_rows=MAX_RESULT_SIZE,
+            downcast_numeric=downcast_numeric,
+        )
+    except ResultSizeExceeded:
+        result_size = check_result_size(cust_id, from_resource, fields, where_clause)
+        n_partitions = result_size // MAX_RESULT_SIZE + 1
+        if "segments.date" in fields and start < end:
+            # rows are already per day, so date windows return the same rows
+            # as the whole range. Use at least enough windows to keep the
+            # thread pool busy
+            queries = []
+            for window_start, window_end in split_date_range(
+                start, end, max(n_partitions, PARTITION_MAX_WORKERS)
+            ):
+                window_clause = make_where_clause(
+                    cust_id, window_start, window_end, zero_impressions
+                )
+                window_clause = " AND ".join([window_clause] + wheres)
+                queries.append(make_query(from_resource, fields, window_clause))
+
+            df = execute_queries(cust_id, queries, fields, downcast_numeric)
+        else:
+            df = execute_partitioned_query(
+                cust_id, query, fields, n_partitions, downcast_numeric
+            )
 
     return df
@@ -6,8 +6,11 @@ setup(
     author='MotiveMetrics',
     install_requires=[
         'boto3',
+        'cachetools',
         'google-ads',
+        'numpy',
         'pandas',
+        'pyarrow',
         'PyMongo',
         'PyYAML'
     ],
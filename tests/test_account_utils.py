@@ -0,0 +1,52 @@
+import asyncio
+
+from google_ads_data import account_utils
+
+
+class FakeCollection:
+    def __init__(self, document):
+        self.document = document
+        self.calls = []
+
+    def find_one(self, criteria, projection=None, collation=None):
+        self.calls.append((criteria, projection, collation))
+        return self.document
+
+
+def test_find_one_by_name():
+    collection = FakeCollection({"accounts": ["a"]})
+    document = account_utils.find_one_by_name(
+        collection, "Car.com", {"type": "google"}, projection={"accounts": 1}
+    )
+    assert document == {"accounts": ["a"]}
+    assert collection.calls == [
+        (
+            {"type": "google", "name": "Car.com"},
+            {"accounts": 1},
+            account_utils.CASE_INSENSITIVE_COLLATION,
+        )
+    ]
+
+
+def test_find_one_by_name_miss_is_one_query():
+    collection = FakeCollection(None)
+    assert account_utils.find_one_by_name(collection, "missing") is None
+    assert len(collection.calls) == 1
+
+
+def test_cust_id_to_refresh_token_async(monkeypatch):
+    lookups = []
+
+    def cust_id_to_account(cust_id, env):
+        lookups.append(cust_id)
+        return {"data": {"refresh_token": "token"}}
+
+    monkeypatch.setattr(account_utils, "cust_id_to_account", cust_id_to_account)
+    account_utils.clear_account_cache()
+    # each asyncio.run uses a new event loop
+    for _ in range(2):
+        refresh_token = asyncio.run(account_utils.cust_id_to_refresh_token_async("123"))
+        assert refresh_token == "token"
+
+    assert lookups == ["123"]
+    account_utils.clear_account_cache()
@@ -0,0 +1,33 @@
+import cachetools
+
+from google_ads_data import cache_utils
+
+
+def test_cached_unless_none():
+    calls = []
+    results = {"a": 1, "b": None}
+
+    @cache_utils.cached_unless_none(cachetools.TTLCache(maxsize=8, ttl=60))
+    def lookup(key):
+        calls.append(key)
+        return results[key]
+
+    assert lookup("a") == 1
+    assert lookup("a") == 1
+    assert lookup("b") is None
+    assert lookup("b") is None
+    assert calls == ["a", "b", "b"]
+
+
+def test_clear_caches():
+    calls = []
+
+    @cache_utils.cached_unless_none(cachetools.TTLCache(maxsize=8, ttl=60))
+    def lookup(key):
+        calls.append(key)
+        return key
+
+    lookup("a")
+    cache_utils.clear_caches()
+    lookup("a")
+    assert calls == ["a", "a"]
@@ -0,0 +1,266 @@
+import datetime
+import types
+
+from google.ads.googleads.v19.common.types.ad_asset import AdTextAsset
+from google.ads.googleads.v19.enums.types.ad_type import AdTypeEnum
+from google.ads.googleads.v19.enums.types.campaign_status import CampaignStatusEnum
+from google.ads.googleads.v19.services.types.google_ads_service import GoogleAdsRow
+import pandas
+import pytest
+
+from google_ads_data import ga_utils
+
+FIELDS = [
+    "campaign.id",
+    "campaign.status",
+    "ad_group_ad.ad.type",
+    "metrics.impressions",
+]
+
+
+def make_row(campaign_id, impressions):
+    row = GoogleAdsRow()
+    row.campaign.id = campaign_id
+    row.campaign.status = CampaignStatusEnum.CampaignStatus.ENABLED
+    row.ad_group_ad.ad.type_ = AdTypeEnum.AdType.RESPONSIVE_SEARCH_AD
+    row.metrics.impressions = impressions
+    return row
+
+
+def test_make_field_getter():
+    row = make_row(123, 45)
+    assert ga_utils.make_field_getter("campaign.id")(row._pb) == 123
+    assert ga_utils.make_field_getter("campaign.status")(row._pb) == "ENABLED"
+    assert ga_utils.make_field_getter("metrics.impressions")(row._pb) == 45
+
+
+def test_make_field_getter_underscore_field():
+    row = make_row(123, 45)
+    getter = ga_utils.make_field_getter("ad_group_ad.ad.type")
+    assert getter(row._pb) == "RESPONSIVE_SEARCH_AD"
+
+
+def test_make_field_getter_unknown_enum_value():
+    row = make_row(1, 10)
+    # a status added to the API after the installed client was generated
+    row._pb.campaign.status = 99
+    assert ga_utils.make_field_getter("campaign.status")(row._pb) == "99"
+    df = ga_utils.results_to_dataframe([row], FIELDS)
+    assert list(df["campaign.status"]) == ["99"]
+
+
+def test_results_to_dataframe():
+    rows = [make_row(1, 10), make_row(2, 20)]
+    df = ga_utils.results_to_dataframe(rows, FIELDS)
+    assert list(df.columns) == FIELDS
+    assert df["campaign.id"].tolist() == [1, 2]
+    assert df["ad_group_ad.ad.type"].dtype == "category"
+    assert df["ad_group_ad.ad.type"].tolist() == ["RESPONSIVE_SEARCH_AD"] * 2
+    assert df["metrics.impressions"].tolist() == [10, 20]
+
+
+def test_downcast_dtypes_keeps_int64_by_default():
+    df = pandas.DataFrame({"metrics.impressions": [0, 1, 2]})
+    df = ga_utils.downcast_dtypes(df)
+    assert df["metrics.impressions"].dtype == "int64"
+
+
+def test_downcast_dtypes_int32_floor():
+    df = pandas.DataFrame(
+        {"metrics.impressions": [0, 1, 2], "metrics.cost_micros": [0, 2 ** 40, 1]}
+    )
+    downcast = ga_utils.downcast_dtypes(df, downcast_numeric=True)
+    assert downcast["metrics.impressions"].dtype == "int32"
+    assert downcast["metrics.cost_micros"].dtype == "int64"
+    # the caller's dataframe is left unchanged
+    assert df["metrics.impressions"].dtype == "int64"
+
+
+def test_results_to_dataframe_repeated_and_message_fields():
+    row = make_row(1, 10)
+    row.ad_group_ad.ad.final_urls.extend(["https://a.example", "https://b.example"])
+    row.ad_group_ad.ad.responsive_search_ad.headlines.append(AdTextAsset(text="Buy now"))
+    fields = [
+        "campaign.id",
+        "ad_group_ad.ad.final_urls",
+        "ad_group_ad.ad.responsive_search_ad.headlines",
+    ]
+    df = ga_utils.results_to_dataframe([row], fields)
+    assert list(df.columns) == fields
+    assert df["ad_group_ad.ad.final_urls"][0] == [
+        "https://a.example",
+        "https://b.example",
+    ]
+    headlines = df["ad_group_ad.ad.responsive_search_ad.headlines"][0]
+    assert isinstance(headlines, list)
+    assert headlines[0]["text"] == "Buy now"
+
+
+def test_build_config_dict_missing_login_customer_id_not_cached(monkeypatch):
+    lookups = []
+
+    def get_login_customer_id(cust_id, refresh_token):
+        lookups.append(cust_id)
+        return None
+
+    monkeypatch.setattr(ga_utils, "cust_id_to_refresh_token", lambda cust_id: "token")
+    monkeypatch.setattr(ga_utils, "get_login_customer_id", get_login_customer_id)
+    for _ in range(2):
+        assert ga_utils.build_config_dict("123") is None
+
+    assert lookups == ["123", "123"]
+
+
+def test_split_date_range():
+    start = datetime.date(2024, 1, 1)
+    windows = ga_utils.split_date_range(start, datetime.date(2024, 1, 10), 4)
+    assert windows == [
+        (datetime.date(2024, 1, 1), datetime.date(2024, 1, 3)),
+        (datetime.date(2024, 1, 4), datetime.date(2024, 1, 6)),
+        (datetime.date(2024, 1, 7), datetime.date(2024, 1, 9)),
+        (datetime.date(2024, 1, 10), datetime.date(2024, 1, 10)),
+    ]
+
+
+def test_split_date_range_more_windows_than_days():
+    windows = ga_utils.split_date_range(
+        datetime.date(2024, 1, 1), datetime.date(2024, 1, 3), 8
+    )
+    assert windows == [
+        (datetime.date(2024, 1, 1), datetime.date(2024, 1, 1)),
+        (datetime.date(2024, 1, 2), datetime.date(2024, 1, 2)),
+        (datetime.date(2024, 1, 3), datetime.date(2024, 1, 3)),
+    ]
+
+
+def test_execute_query(monkeypatch):
+    batches = [
+        types.SimpleNamespace(results=[make_row(1, 10), make_row(2, 20)]),
+        types.SimpleNamespace(results=[make_row(3, 30)]),
+    ]
+    service = types.SimpleNamespace(search_stream=lambda **kwargs: iter(batches))
+    monkeypatch.setattr(ga_utils, "get_ga_api_service", lambda cust_id, name: service)
+    df = ga_utils.execute_query("123", "SELECT", FIELDS)
+    assert list(df["campaign.id"]) == [1, 2, 3]
+    assert list(df["metrics.impressions"]) == [10, 20, 30]
+
+
+def test_check_result_size_query():
+    requests = []
+
+    def search(request):
+        requests.append(request)
+        return types.SimpleNamespace(total_results_count=42)
+
+    service = types.SimpleNamespace(search=search)
+    client = types.SimpleNamespace(
+        get_type=lambda name: types.SimpleNamespace(),
+        get_service=lambda name, version=None: service,
+    )
+    count = ga_utils.check_result_size(
+        "123",
+        "ad_group_ad",
+        ["campaign.id", "ad_group_ad.ad.type", "segments.date", "metrics.impressions"],
+        "metrics.impressions > 0",
+        client=client,
+    )
+    assert count == 42
+    assert requests[0].customer_id == "123"
+    assert requests[0].return_total_results_count is True
+    assert not hasattr(requests[0], "page_size")
+    assert requests[0].query == ga_utils.make_query(
+        "ad_group_ad", ["campaign.id", "segments.date"], "metrics.impressions > 0"
+    ) + " LIMIT 1"
+
+
+def test_get_ga_data_date_windows(monkeypatch):
+    queries = []
+
+    def execute_query(cust_id, query, fields, max_rows=None, downcast_numeric=False):
+        if max_rows is not None:
+            raise ga_utils.ResultSizeExceeded(f"query returned more than {max_rows} results")
+
+        queries.append(query)
+        return pandas.DataFrame({"segments.date": [query]})
+
+    monkeypatch.setattr(ga_utils, "execute_query", execute_query)
+    monkeypatch.setattr(
+        ga_utils,
+        "check_result_size",
+        lambda *args, **kwargs: 3 * ga_utils.MAX_RESULT_SIZE,
+    )
+    df = ga_utils.get_ga_data(
+        "123",
+        "campaign",
+        ["campaign.id", "segments.date"],
+        start=datetime.date(2024, 1, 1),
+        end=datetime.date(2024, 1, 16),
+        wheres=["campaign.status = 'ENABLED'"],
+    )
+    # at least PARTITION_MAX_WORKERS windows of two days each
+    queries.sort()
+    assert len(queries) == 8
+    assert len(df) == 8
+    assert (
+        "segments.date >= '2024-01-01' AND segments.date <= '2024-01-02'"
+        " AND campaign.status = 'ENABLED'"
+    ) in queries[0]
+    assert "segments.date >= '2024-01-15' AND segments.date <= '2024-01-16'" in queries[-1]
+
+
+def test_concat_dataframes_unifies_categories():
+    dfs = [
+        pandas.DataFrame({"campaign.status": pandas.Categorical(["ENABLED"])}),
+        pandas.DataFrame({"campaign.status": pandas.Categorical([])}),
+        pandas.DataFrame({"campaign.status": pandas.Categorical(["PAUSED"])}),
+    ]
+    df = ga_utils.concat_dataframes(dfs)
+    assert df["campaign.status"].dtype == "category"
+    assert list(df["campaign.status"]) == ["ENABLED", "PAUSED"]
+
+
+def test_execute_query_max_rows(monkeypatch):
+    batches = [types.SimpleNamespace(results=[make_row(i, i) for i in range(3)])]
+    service = types.SimpleNamespace(search_stream=lambda **kwargs: iter(batches))
+    monkeypatch.setattr(ga_utils, "get_ga_api_service", lambda cust_id, name: service)
+    with pytest.raises(ga_utils.ResultSizeExceeded):
+        ga_utils.execute_query("123", "SELECT", FIELDS, max_rows=2)
+
+
+def test_prefetch():
+    assert list(ga_utils.prefetch(range(100), size=2)) == list(range(100))
+
+
+def test_prefetch_raises_iterable_error():
+    def items():
+        yield 1
+        raise ValueError("stream failed")
+
+    iterator = ga_utils.prefetch(items())
+    assert next(iterator) == 1
+    with pytest.raises(ValueError, match="stream failed"):
+        next(iterator)
+
+
+def test_prefetch_early_close():
+    consumed = []
+
+    def items():
+        for i in range(1000):
+            consumed.append(i)
+            yield i
+
+    iterator = ga_utils.prefetch(items(), size=2)
+    assert next(iterator) == 0
+    iterator.close()
+    # the producer gives up once the caller has gone, so at most the queued
+    # items and the one it was trying to put are read
+    assert len(consumed) <= 4
+
+
+def test_execute_query_downcast_numeric(monkeypatch):
+    batches = [types.SimpleNamespace(results=[make_row(1, 10)])]
+    service = types.SimpleNamespace(search_stream=lambda **kwargs: iter(batches))
+    monkeypatch.setattr(ga_utils, "get_ga_api_service", lambda cust_id, name: service)
+    df = ga_utils.execute_query("123", "SELECT", FIELDS, downcast_numeric=True)
+    assert df["metrics.impressions"].dtype == "int32"